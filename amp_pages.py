@@ -0,0 +1,416 @@
+"""
+AMP variants of the blog articles.
+Derives each blog/<slug>/amp/index.html from its canonical article: scripts
+and forms are stripped, media become AMP components and the AMP stylesheet
+is inlined. Called by rebuild_blog_index.py while it parses the articles.
+"""
+
+import hashlib
+import html
+import json
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+AMP_CSS_FILE = Path("blog/assets/css/amp.css")
+# AMP rejects pages whose <style amp-custom> is larger than this
+AMP_CSS_MAX_BYTES = 75000
+
+# Fallback size for images without width/height, as Ghost used to do
+DEFAULT_IMAGE_WIDTH = 600
+DEFAULT_IMAGE_HEIGHT = 400
+
+AMP_SCRIPT_URL = "https://cdn.ampproject.org/v0/{}-0.1.js"
+
+SITE_URL = "https://www.melmelboo.fr"
+
+# Dates are stored in UTC but displayed in the blog's timezone
+SITE_TIMEZONE = ZoneInfo("Europe/Paris")
+
+# schema.org publisher and author used when the canonical page has none.
+# Google requires the publisher logo for AMP Article structured data.
+DEFAULT_PUBLISHER = {
+    "@type": "Organization",
+    "name": "Melmelboo",
+    "logo": {
+        "@type": "ImageObject",
+        "url": "https://www.melmelboo.fr/blog/favicon.ico",
+        "width": 60,
+        "height": 60,
+    },
+}
+DEFAULT_AUTHOR = {
+    "@type": "Person",
+    "name": "Melmelboo",
+    "url": "https://www.melmelboo.fr/blog/author/melmelboo-2/",
+    "sameAs": [],
+}
+
+# Trailing comment recording what an AMP page was built from. Bump the
+# version whenever render_amp_page output changes to rebuild every page.
+AMP_TEMPLATE_VERSION = 6
+AMP_SOURCE_STAMP = "<!-- amp-source: {} -->\n"
+
+# Dropped along with everything they contain
+STRIPPED_WITH_CONTENT = {'script', 'style', 'noscript', 'form', 'object', 'template'}
+# Dropped, but their content is kept
+STRIPPED_TAGS = {'embed', 'param', 'link', 'meta', 'base', 'input', 'button', 'select', 'textarea', 'font'}
+VOID_TAGS = {'area', 'br', 'col', 'hr', 'img', 'source', 'track', 'wbr'}
+AMP_TAGS = {'iframe': 'amp-iframe', 'video': 'amp-video'}
+# <img> attributes carried over to <amp-img>, the theme styles .top_image
+IMAGE_ATTRS = {'src', 'alt', 'title', 'class', 'id'}
+
+_amp_css = None
+
+
+def load_amp_css():
+    """Read the AMP stylesheet once, refusing one over the AMP size cap."""
+    global _amp_css
+    if _amp_css is None:
+        with open(AMP_CSS_FILE, 'r', encoding='utf-8') as f:
+            css = f.read().strip()
+        size = len(css.encode('utf-8'))
+        if size > AMP_CSS_MAX_BYTES:
+            raise ValueError(f"{AMP_CSS_FILE} is {size} bytes, AMP allows {AMP_CSS_MAX_BYTES}")
+        _amp_css = css
+    return _amp_css
+
+
+def amp_url(url):
+    """Rebase an article-relative URL for the amp/ subdirectory."""
+    if not url or url.startswith(('/', '#')) or urlsplit(url).scheme:
+        return url
+    return "../" + url
+
+
+def format_attrs(attrs):
+    """Serialize (name, value) pairs back to HTML attributes."""
+    return "".join(
+        f' {name}' if value is None else f' {name}="{html.escape(value)}"'
+        for name, value in attrs
+    )
+
+
+class AmpContentConverter(HTMLParser):
+    """Rewrite the post-content section of an article as AMP markup."""
+
+    def __init__(self):
+        super().__init__()
+        self.depth = 0
+        self.skipping = None
+        self.skip_nesting = 0
+        self.found = False
+        self.parts = []
+        self.extensions = set()
+
+    def handle_starttag(self, tag, attrs):
+        attrs_dict = dict(attrs)
+
+        if not self.depth:
+            if tag == "section" and "post-content" in (attrs_dict.get("class") or ""):
+                self.depth = 1
+                self.found = True
+            return
+
+        if self.skipping:
+            if tag == self.skipping:
+                self.skip_nesting += 1
+            return
+        if tag in STRIPPED_WITH_CONTENT:
+            self.skipping = tag
+            self.skip_nesting = 1
+            return
+        if tag in STRIPPED_TAGS:
+            return
+        if tag == "section":
+            self.depth += 1
+
+        if tag == "img":
+            self.handle_image(attrs)
+        elif tag == "iframe":
+            self.handle_iframe(attrs_dict)
+        elif tag == "video":
+            self.extensions.add("amp-video")
+            self.parts.append(f"<amp-video{format_attrs(self.video_attrs(attrs_dict))}>")
+        else:
+            kept = [
+                (name, amp_url(value) if name in ("href", "src") else value)
+                for name, value in attrs
+                if name != "style" and not name.startswith("on")
+            ]
+            self.parts.append(f"<{tag}{format_attrs(kept)}>")
+
+    def video_attrs(self, attrs_dict):
+        """Attributes of an <amp-video> built from a <video>."""
+        attrs = []
+        if attrs_dict.get("src"):
+            attrs.append(("src", amp_url(attrs_dict["src"])))
+        attrs.extend([
+            ("width", attrs_dict.get("width") or str(DEFAULT_IMAGE_WIDTH)),
+            ("height", attrs_dict.get("height") or str(DEFAULT_IMAGE_HEIGHT)),
+            ("controls", None),
+            ("layout", "responsive"),
+        ])
+        return attrs
+
+    def handle_image(self, attrs):
+        """Turn an <img> into an <amp-img>, or <amp-anim> for GIFs."""
+        attrs_dict = dict(attrs)
+        src = attrs_dict.get("src")
+        if not src:
+            return
+        amp_tag = "amp-anim" if urlsplit(src).path.lower().endswith(".gif") else "amp-img"
+        if amp_tag == "amp-anim":
+            self.extensions.add("amp-anim")
+        kept = [
+            (name, amp_url(value) if name == "src" else value)
+            for name, value in attrs
+            if name in IMAGE_ATTRS and value is not None
+        ]
+        kept.extend([
+            ("width", attrs_dict.get("width") or str(DEFAULT_IMAGE_WIDTH)),
+            ("height", attrs_dict.get("height") or str(DEFAULT_IMAGE_HEIGHT)),
+            ("layout", "responsive"),
+        ])
+        self.parts.append(f"<{amp_tag}{format_attrs(kept)}></{amp_tag}>")
+
+    def handle_iframe(self, attrs_dict):
+        """Turn an HTTPS <iframe> into an <amp-iframe>, drop others."""
+        src = attrs_dict.get("src") or ""
+        if src.startswith("//"):
+            src = "https:" + src
+        if not src.startswith("https://"):
+            self.skipping = "iframe"
+            self.skip_nesting = 1
+            return
+        self.extensions.add("amp-iframe")
+        self.parts.append("<amp-iframe" + format_attrs([
+            ("src", src),
+            ("width", attrs_dict.get("width") or str(DEFAULT_IMAGE_WIDTH)),
+            ("height", attrs_dict.get("height") or str(DEFAULT_IMAGE_HEIGHT)),
+            ("frameborder", "0"),
+            ("allowfullscreen", None),
+            ("sandbox", "allow-scripts allow-same-origin"),
+            ("layout", "responsive"),
+        ]) + ">")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if not self.depth:
+            return
+        if self.skipping:
+            if tag == self.skipping:
+                self.skip_nesting -= 1
+                if not self.skip_nesting:
+                    self.skipping = None
+            return
+        if tag == "section":
+            self.depth -= 1
+            if not self.depth:
+                return
+        if tag in STRIPPED_TAGS or tag in VOID_TAGS:
+            return
+        self.parts.append(f"</{AMP_TAGS.get(tag, tag)}>")
+
+    def handle_data(self, data):
+        if self.depth and not self.skipping:
+            self.parts.append(html.escape(data, quote=False))
+
+
+def render_amp_page(content, article):
+    """Render the AMP variant of a canonical article, or None without content."""
+    converter = AmpContentConverter()
+    converter.feed(content)
+    converter.close()
+    if not converter.found:
+        return None
+
+    title = html.escape(article['title'])
+    description = html.escape(article['description'])
+    image = html.escape(article['image'])
+    date_iso = article['date'].astimezone(SITE_TIMEZONE).strftime("%Y-%m-%d") if article['date'] else ""
+
+    extensions = "".join(
+        f'\n    <script async custom-element="{name}" src="{AMP_SCRIPT_URL.format(name)}"></script>'
+        for name in sorted(converter.extensions)
+    )
+
+    publisher = article['publisher']
+    author = article['author'] or DEFAULT_AUTHOR
+    structured_data = {
+        "@context": "https://schema.org",
+        "@type": "Article",
+        "publisher": publisher if publisher and publisher.get("logo") else DEFAULT_PUBLISHER,
+        "author": author,
+        "headline": article['title'],
+        "url": article['canonical_url'],
+    }
+    if article['date']:
+        structured_data["datePublished"] = article['date'].isoformat()
+    if article['modified_date']:
+        structured_data["dateModified"] = article['modified_date'].isoformat()
+    if article['image']:
+        structured_data["image"] = {"@type": "ImageObject", "url": article['image']}
+        if article['image_width'].isdigit() and article['image_height'].isdigit():
+            structured_data["image"]["width"] = int(article['image_width'])
+            structured_data["image"]["height"] = int(article['image_height'])
+    if article['tags']:
+        structured_data["keywords"] = ", ".join(article['tags'])
+    structured_data["description"] = article['description']
+    structured_data["mainEntityOfPage"] = {"@type": "WebPage", "@id": article['canonical_url']}
+    structured_data = json.dumps(structured_data, ensure_ascii=False, indent=4).replace("</", "<\\/")
+
+    feature_image = ""
+    if article['image']:
+        feature_image = f"""
+            <figure class="post-image">
+                <amp-img src="{image}" width="{article['image_width'] or DEFAULT_IMAGE_WIDTH}" height="{article['image_height'] or DEFAULT_IMAGE_HEIGHT}" layout="responsive"></amp-img>
+            </figure>"""
+
+    modified_time = ""
+    if article['modified_date']:
+        modified_time = f"""
+    <meta property="article:modified_time" content="{html.escape(article['modified_date'].isoformat())}" >"""
+
+    image_size = ""
+    if article['image'] and article['image_width'] and article['image_height']:
+        image_size = f"""
+    <meta property="og:image:width" content="{html.escape(article['image_width'])}" >
+    <meta property="og:image:height" content="{html.escape(article['image_height'])}" >"""
+
+    article_meta = "".join(
+        f'\n    <meta property="article:tag" content="{html.escape(tag)}" >' for tag in article['tags']
+    )
+    if article['publisher_url']:
+        article_meta += f'\n    <meta property="article:publisher" content="{html.escape(article["publisher_url"])}" >'
+
+    author_name = html.escape(author.get("name") or "")
+    twitter_card = f"""
+    <meta name="twitter:card" content="{'summary_large_image' if article['image'] else 'summary'}" >
+    <meta name="twitter:title" content="{title}" >
+    <meta name="twitter:description" content="{description}" >
+    <meta name="twitter:url" content="{html.escape(article['canonical_url'])}" >"""
+    if article['image']:
+        twitter_card += f"""
+    <meta name="twitter:image" content="{image}" >"""
+    if author_name:
+        twitter_card += f"""
+    <meta name="twitter:label1" content="Written by" >
+    <meta name="twitter:data1" content="{author_name}" >"""
+    if article['tags']:
+        twitter_card += f"""
+    <meta name="twitter:label2" content="Filed under" >
+    <meta name="twitter:data2" content="{html.escape(', '.join(article['tags']))}" >"""
+
+    byline = ""
+    if author_name:
+        author_url = author.get("url") or ""
+        if author_url.startswith(f"{SITE_URL}/blog/"):
+            author_url = "../../" + author_url[len(f"{SITE_URL}/blog/"):] + "index.html"
+        byline = f"""
+                    <p class="author">by <a href="{html.escape(author_url)}">{author_name}</a></p>"""
+
+    post_date = ""
+    if date_iso:
+        post_date = f"""
+                    <time class="post-date" datetime="{date_iso}">{date_iso}</time>"""
+
+    post_meta = ""
+    if byline or post_date:
+        post_meta = f"""
+                <section class="post-meta">{byline}{post_date}
+                </section>"""
+
+    return f"""<!DOCTYPE html>
+<html ⚡ lang="fr">
+<head>
+    <meta charset="utf-8">
+
+    <title>{title}</title>
+    <meta name="description" content="{description}" >
+
+    <meta name="HandheldFriendly" content="True" >
+    <meta name="viewport" content="width=device-width,minimum-scale=1,initial-scale=1">
+
+    <link rel="shortcut icon" href="../../favicon.ico" type="image/x-icon" >
+    <link rel="canonical" href="../index.html" >
+    <meta name="referrer" content="no-referrer-when-downgrade" >
+
+    <meta property="og:site_name" content="Melmelboo" >
+    <meta property="og:type" content="article" >
+    <meta property="og:title" content="{title}" >
+    <meta property="og:description" content="{description}" >
+    <meta property="og:url" content="{html.escape(article['canonical_url'])}" >
+    <meta property="og:image" content="{image}" >
+    <meta property="article:published_time" content="{html.escape(article['date'].isoformat()) if article['date'] else ''}" >{modified_time}{article_meta}{twitter_card}{image_size}
+
+    <script type="application/ld+json">
+{structured_data}
+    </script>
+
+    <link rel="alternate" type="application/rss+xml" title="Melmelboo" href="../../rss/index.html" >
+
+    <link rel="stylesheet" type="text/css" href="https://fonts.googleapis.com/css?family=Merriweather:300,700,700italic,300italic|Open+Sans:700,600,400" >
+
+    <style amp-custom>{load_amp_css()}</style>
+    <style amp-boilerplate>body{{-webkit-animation:-amp-start 8s steps(1,end) 0s 1 normal both;-moz-animation:-amp-start 8s steps(1,end) 0s 1 normal both;-ms-animation:-amp-start 8s steps(1,end) 0s 1 normal both;animation:-amp-start 8s steps(1,end) 0s 1 normal both}}@-webkit-keyframes -amp-start{{from{{visibility:hidden}}to{{visibility:visible}}}}@-moz-keyframes -amp-start{{from{{visibility:hidden}}to{{visibility:visible}}}}@-ms-keyframes -amp-start{{from{{visibility:hidden}}to{{visibility:visible}}}}@-o-keyframes -amp-start{{from{{visibility:hidden}}to{{visibility:visible}}}}@keyframes -amp-start{{from{{visibility:hidden}}to{{visibility:visible}}}}</style><noscript><style amp-boilerplate>body{{-webkit-animation:none;-moz-animation:none;-ms-animation:none;animation:none}}</style></noscript>
+    <script async src="https://cdn.ampproject.org/v0.js"></script>{extensions}
+</head>
+
+<body class="amp-template">
+    <header class="main-header">
+        <nav class="blog-title">
+            <a href="/blog/">Melmelboo</a>
+        </nav>
+    </header>
+
+    <main class="content" role="main">
+        <article class="post">
+
+            <header class="post-header">
+                <h1 class="post-title">{title}</h1>{post_meta}
+            </header>{feature_image}
+            <section class="post-content">
+{"".join(converter.parts)}
+            </section>
+
+        </article>
+    </main>
+    <footer class="site-footer clearfix">
+        <section class="copyright"><a href="/blog/">Melmelboo</a></section>
+    </footer>
+</body>
+</html>
+"""
+
+
+def write_amp_page(article_path, content, article):
+    """Write blog/<slug>/amp/index.html, skipping it when unchanged.
+
+    Pages stamped with the hash of the current canonical content and
+    stylesheet are skipped without being rendered again. Returns True
+    when the file was (re)written.
+    """
+    source = f"{AMP_TEMPLATE_VERSION}\n{load_amp_css()}\n{content}"
+    stamp = AMP_SOURCE_STAMP.format(hashlib.sha1(source.encode('utf-8')).hexdigest())
+
+    amp_file = article_path / "amp" / "index.html"
+    if amp_file.exists():
+        with open(amp_file, 'r', encoding='utf-8') as f:
+            if f.read().endswith(stamp):
+                return False
+
+    amp_html = render_amp_page(content, article)
+    if amp_html is None:
+        return False
+    amp_html += stamp
+
+    amp_file.parent.mkdir(exist_ok=True)
+    with open(amp_file, 'w', encoding='utf-8') as f:
+        f.write(amp_html)
+    return True
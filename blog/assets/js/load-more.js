@@ -0,0 +1,90 @@
+/**
+ * "Load more" for the blog listing.
+ *
+ * Each blog/page/N/ directory also holds a posts.json fragment with the
+ * same articles as its index.html. When JS is available, the pagination
+ * links are replaced by a button (and infinite scroll) that appends the
+ * next fragment in place and prefetches the one after it. Without JS the
+ * regular pagination links still work; if a fragment fails to load, the
+ * button falls back to the full page when clicked.
+ */
+
+/* globals jQuery, window */
+(function ($, undefined) {
+    "use strict";
+
+    var FRAGMENT_NAME = "posts.json",
+        SCROLL_MARGIN = 600;
+
+    function fragmentUrl(pageUrl) {
+        return pageUrl.replace(/\/?$/, "/") + FRAGMENT_NAME;
+    }
+
+    $(function () {
+        var $loop = $(".posts-loop"),
+            $pagination = $loop.find("nav.pagination"),
+            $next = $pagination.find("a.newer-posts");
+
+        if (!$loop.length || !$next.length || !window.JSON) {
+            return;
+        }
+
+        var nextPageUrl = $next.attr("href"),
+            nextUrl = fragmentUrl(nextPageUrl),
+            pending = {},
+            loading = false,
+            $more = $('<p class="read-more load-more"><a href="' + nextPageUrl + '">Plus d\'articles →</a></p>');
+
+        function fetchFragment(url) {
+            if (!pending[url]) {
+                pending[url] = $.ajax({url: url, dataType: "json", cache: true});
+            }
+            return pending[url];
+        }
+
+        // Only an explicit click falls back to the full page on failure
+        function loadNext(clicked) {
+            if (loading || !nextUrl) {
+                return;
+            }
+            var url = nextUrl;
+            loading = true;
+            fetchFragment(url).done(function (fragment) {
+                delete pending[url];
+                $more.before(fragment.html);
+                nextUrl = fragment.next;
+                if (nextUrl) {
+                    $more.find("a").attr("href", nextUrl.replace(FRAGMENT_NAME, ""));
+                    // Warm the following page while the reader scrolls
+                    fetchFragment(nextUrl);
+                } else {
+                    $more.remove();
+                    $(window).off("scroll.loadmore");
+                }
+                loading = false;
+            }).fail(function () {
+                delete pending[url];
+                loading = false;
+                if (clicked) {
+                    // Fall back to the full-page link
+                    window.location = $more.find("a").attr("href");
+                } else {
+                    // Leave the link to the reader rather than retrying on every scroll
+                    $(window).off("scroll.loadmore");
+                }
+            });
+        }
+
+        $pagination.hide().after($more);
+        $more.on("click", "a", function (e) {
+            e.preventDefault();
+            loadNext(true);
+        });
+        $(window).on("scroll.loadmore", function () {
+            if ($(window).scrollTop() + $(window).height() + SCROLL_MARGIN >= $more.offset().top) {
+                loadNext(false);
+            }
+        });
+        fetchFragment(nextUrl);
+    });
+})(jQuery);
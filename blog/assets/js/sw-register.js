@@ -0,0 +1,15 @@
+/**
+ * Registers the blog service worker (blog/sw.js, generated by
+ * rebuild_blog_index.py) once the page has loaded.
+ */
+
+/* globals window, navigator */
+(function () {
+    "use strict";
+
+    if ("serviceWorker" in navigator) {
+        window.addEventListener("load", function () {
+            navigator.serviceWorker.register("/blog/sw.js", {scope: "/blog/"});
+        });
+    }
+})();
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Script to check the generated static pages against performance budgets.
+Computes per-page weight metrics (HTML and gzip bytes, requests per origin,
+images without dimensions, render-blocking resources) for every HTML page
+and compares them to the budget of its page type.
+
+Exits with status 1 when a page is over budget, unless --report-only.
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from deploy_manifest import SITE_DIR, list_files
+from rebuild_blog_index import EXCLUDE_DIRS
+
+REPORT_FILE = Path("build/budgets/report.json")
+
+# Budgets per page type, set just above the heaviest page of each type so
+# that any growth fails the build. Override per metric with --budgets FILE.
+BUDGETS = {
+    'listing': {
+        'html_bytes': 16000,
+        'gzip_bytes': 4500,
+        'requests': 28,
+        'third_party_origins': 3,
+        'images_without_dimensions': 15,
+        'render_blocking': 3,
+    },
+    'article': {
+        'html_bytes': 43000,
+        'gzip_bytes': 13500,
+        'requests': 160,
+        'third_party_origins': 3,
+        'images_without_dimensions': 150,
+        'render_blocking': 3,
+    },
+    'amp': {
+        'html_bytes': 60000,
+        'gzip_bytes': 16000,
+        'requests': 150,
+        'third_party_origins': 4,
+        'images_without_dimensions': 0,
+        'render_blocking': 1,
+    },
+    'projects': {
+        'html_bytes': 40000,
+        'gzip_bytes': 5000,
+        'requests': 150,
+        'third_party_origins': 4,
+        'images_without_dimensions': 140,
+        'render_blocking': 7,
+    },
+    'other': {
+        'html_bytes': 36000,
+        'gzip_bytes': 12000,
+        'requests': 30,
+        'third_party_origins': 6,
+        'images_without_dimensions': 15,
+        'render_blocking': 5,
+    },
+}
+
+
+class PageWeightParser(HTMLParser):
+    """Collect the subresources a page requests."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_head = False
+        self.resources = []
+        self.images_without_dimensions = 0
+        self.render_blocking = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs_dict = dict(attrs)
+
+        if tag == "head":
+            self.in_head = True
+        elif tag == "body":
+            self.in_head = False
+
+        if tag in ("img", "amp-img"):
+            if attrs_dict.get("src"):
+                self.resources.append(attrs_dict["src"])
+            if not attrs_dict.get("width") or not attrs_dict.get("height"):
+                self.images_without_dimensions += 1
+        elif tag in ("script", "iframe", "source") and attrs_dict.get("src"):
+            self.resources.append(attrs_dict["src"])
+            # Parser-blocking scripts in <head> delay the first render
+            if (tag == "script" and self.in_head
+                    and "async" not in attrs_dict and "defer" not in attrs_dict):
+                self.render_blocking.append(attrs_dict["src"])
+        elif tag == "link" and attrs_dict.get("href"):
+            rel = (attrs_dict.get("rel") or "").lower().split()
+            if "stylesheet" in rel:
+                self.resources.append(attrs_dict["href"])
+                if attrs_dict.get("media", "all") in ("all", "screen"):
+                    self.render_blocking.append(attrs_dict["href"])
+            elif "icon" in rel or "preload" in rel:
+                self.resources.append(attrs_dict["href"])
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.in_head = False
+
+
+def get_page_type(path):
+    """Classify a page path relative to the site root."""
+    parts = Path(path).parts
+    if parts[0] == "projects":
+        return 'projects'
+    if "amp" in parts:
+        return 'amp'
+    if parts[0] == "blog":
+        # blog/index.html, blog/page/N/ and blog/{author,tag}/<name>[/page/N]/
+        if path == "blog/index.html" or parts[1] == "page" or parts[1] in ("author", "tag"):
+            return 'listing'
+        if len(parts) == 3 and parts[1] not in EXCLUDE_DIRS and parts[2] == "index.html":
+            return 'article'
+    return 'other'
+
+
+def is_html_document(path):
+    """Tell whether a .html file holds HTML, not e.g. the RSS feed XML."""
+    with open(SITE_DIR / path, 'rb') as f:
+        head = f.read(256).lstrip()
+    return not head.startswith(b"<?xml")
+
+
+def get_origin(url):
+    """Return the origin of a resource URL, or "self" for same-site ones."""
+    parts = urlsplit(url)
+    if parts.scheme in ("data", "blob"):
+        return None
+    if not parts.netloc or parts.netloc in ("melmelboo.fr", "www.melmelboo.fr"):
+        return "self"
+    return parts.netloc
+
+
+def measure_page(path):
+    """Compute the weight metrics of one page."""
+    with open(SITE_DIR / path, 'rb') as f:
+        raw = f.read()
+
+    parser = PageWeightParser()
+    parser.feed(raw.decode('utf-8', errors='replace'))
+
+    origins = Counter(filter(None, (get_origin(url) for url in parser.resources)))
+    return {
+        'path': path,
+        'type': get_page_type(path),
+        'html_bytes': len(raw),
+        'gzip_bytes': len(gzip.compress(raw, compresslevel=6)),
+        'requests': sum(origins.values()),
+        'third_party_origins': len([origin for origin in origins if origin != "self"]),
+        'origins': dict(origins),
+        'images_without_dimensions': parser.images_without_dimensions,
+        'render_blocking': len(parser.render_blocking),
+        'render_blocking_resources': parser.render_blocking,
+    }
+
+
+def check_budget(metrics, budgets):
+    """Return the budget violations of a page as readable strings."""
+    budget = budgets.get(metrics['type'], {})
+    return [
+        f"{name} {metrics[name]} > {limit}"
+        for name, limit in budget.items()
+        if name in metrics and metrics[name] > limit
+    ]
+
+
+def load_budgets(path):
+    """Merge per-type overrides from a JSON file into the default budgets."""
+    budgets = {page_type: dict(budget) for page_type, budget in BUDGETS.items()}
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            for page_type, overrides in json.load(f).items():
+                budgets.setdefault(page_type, {}).update(overrides)
+    return budgets
+
+
+def main():
+    """Main function to check page budgets."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--budgets", type=Path,
+                            help="JSON file of per-type budget overrides")
+    arg_parser.add_argument("--report-only", action="store_true",
+                            help="write the report without failing on violations")
+    args = arg_parser.parse_args()
+
+    budgets = load_budgets(args.budgets)
+    pages = [
+        path for path in list_files(SITE_DIR)
+        if path.endswith(".html") and is_html_document(path)
+    ]
+    print(f"Measuring {len(pages)} pages...")
+
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(measure_page, pages, chunksize=32))
+
+    failures = 0
+    for metrics in results:
+        metrics['violations'] = check_budget(metrics, budgets)
+        if metrics['violations']:
+            failures += 1
+            print(f"{metrics['path']} ({metrics['type']}): {', '.join(metrics['violations'])}")
+
+    REPORT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'budgets': budgets, 'pages': results}, f, indent=1)
+        f.write("\n")
+
+    print(f"{failures} of {len(results)} pages over budget, report in {REPORT_FILE}")
+    if failures and not args.report_only:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
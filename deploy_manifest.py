@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Script to compute what a deploy of the static melmelboo site must upload.
+Hashes every deployable file into a manifest, diffs it against the manifest
+of the previous deploy and emits the added/changed/deleted paths together
+with the CDN URLs to purge.
+
+A local directory can stand in for the remote with --remote: its manifest
+(or, when missing, its actual content) is the previous state, and --apply
+copies the changes into it.
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+SITE_DIR = Path(".")
+OUTPUT_DIR = Path("build/deploy")
+MANIFEST_NAME = "deploy-manifest.json"
+SITE_URL = "https://www.melmelboo.fr"
+
+# Repository files that are not part of the published site, on top of the
+# dotfiles, the build scripts and everything .gitignore excludes
+GITIGNORE_FILE = SITE_DIR / ".gitignore"
+EXCLUDE_NAMES = {MANIFEST_NAME, 'requirements.txt'}
+EXCLUDE_SUFFIXES = {'.py', '.pyc'}
+
+
+def load_ignore_patterns(path=GITIGNORE_FILE):
+    """Read the .gitignore patterns as (pattern, anchored, dir_only) tuples.
+
+    Covers the syntax this repository uses: globs, a leading / anchoring
+    the pattern to the root and a trailing / matching directories only.
+    Negations are not supported and skipped.
+    """
+    patterns = []
+    if not Path(path).exists():
+        return patterns
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(('#', '!')):
+                continue
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            patterns.append((line.lstrip('/'), anchored, dir_only))
+    return patterns
+
+
+IGNORE_PATTERNS = load_ignore_patterns()
+
+
+def is_ignored(path, is_dir=False):
+    """Tell whether .gitignore excludes a path relative to the site root."""
+    for pattern, anchored, dir_only in IGNORE_PATTERNS:
+        if dir_only and not is_dir:
+            continue
+        if fnmatch.fnmatchcase(path.as_posix() if anchored else path.name, pattern):
+            return True
+    return False
+
+
+def is_deployable(path, is_dir=False):
+    """Tell whether a path relative to the site root gets published.
+
+    Parent directories are checked by list_files while it walks the tree.
+    """
+    if path.name.startswith('.') or path.name in EXCLUDE_NAMES or is_ignored(path, is_dir):
+        return False
+    return is_dir or path.suffix not in EXCLUDE_SUFFIXES
+
+
+def list_files(root, base=Path()):
+    """List deployable files under root as POSIX paths relative to it.
+
+    base is the path of root relative to the site root, so that anchored
+    .gitignore patterns still apply when listing a subdirectory.
+    Symlinks (assets, page, qui-suis-je, tour-du-monde.html) are aliases
+    of blog/ content and are not followed, see list_aliases.
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root)
+        dirnames[:] = [d for d in dirnames if is_deployable(base / rel_dir / d, is_dir=True)]
+        for filename in filenames:
+            rel_path = rel_dir / filename
+            if is_deployable(base / rel_path) and not (Path(dirpath) / filename).is_symlink():
+                files.append(rel_path.as_posix())
+    return sorted(files)
+
+
+def list_aliases(root):
+    """Map the files served through symlinks under root to their target.
+
+    The web server follows the symlinks, so /assets/css/fonts.css serves
+    blog/assets/css/fonts.css: both URLs must be uploaded and purged.
+    Returns {alias path: target path}, both relative to root.
+    """
+    root = Path(root)
+    resolved_root = root.resolve()
+    aliases = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root)
+        dirnames[:] = [d for d in dirnames if is_deployable(rel_dir / d, is_dir=True)]
+        for name in dirnames + filenames:
+            link = Path(dirpath) / name
+            if not link.is_symlink() or not is_deployable(rel_dir / name, is_dir=link.is_dir()):
+                continue
+            try:
+                target = link.resolve().relative_to(resolved_root)
+            except ValueError:
+                print(f"Skipping {rel_dir / name}: links outside of the site")
+                continue
+            if link.is_dir():
+                for rel_path in list_files(root / target, base=target):
+                    aliases[(rel_dir / name / rel_path).as_posix()] = (target / rel_path).as_posix()
+            elif link.is_file():
+                aliases[(rel_dir / name).as_posix()] = target.as_posix()
+    return aliases
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest and size of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest(), path.stat().st_size
+
+
+def build_manifest(root):
+    """Map every deployable path under root to its content hash and size.
+
+    Paths served through a symlink get their own entry, hashed from the
+    target and recording it as 'alias_of'.
+    """
+    root = Path(root)
+    paths = list_files(root)
+    with ThreadPoolExecutor() as executor:
+        hashes = executor.map(lambda path: hash_file(root / path), paths)
+        manifest = {
+            path: {'sha256': sha256, 'size': size}
+            for path, (sha256, size) in zip(paths, hashes)
+        }
+    for alias, target in list_aliases(root).items():
+        entry = manifest.get(target)
+        if entry is None:
+            entry = dict(zip(('sha256', 'size'), hash_file(root / target)))
+        manifest[alias] = dict(entry, alias_of=target)
+    return manifest
+
+
+def load_manifest(path):
+    """Load a manifest written by write_manifest, or None if absent."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, path):
+    """Write a manifest as stable, diff-friendly JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def diff_manifests(previous, current):
+    """Return the added, changed and deleted paths between two manifests."""
+    added = sorted(set(current) - set(previous))
+    deleted = sorted(set(previous) - set(current))
+    changed = sorted(
+        path for path in set(current) & set(previous)
+        if current[path]['sha256'] != previous[path]['sha256']
+    )
+    return {'added': added, 'changed': changed, 'deleted': deleted}
+
+
+def purge_urls(changes, previous, current, site_url=SITE_URL):
+    """List the CDN URLs serving changed or deleted files.
+
+    Added files were never cached, except aliases of an already deployed
+    file: the symlink served them before they had a manifest entry.
+    Directory indexes are also purged under their directory URL
+    (blog/hanoi/ for blog/hanoi/index.html).
+    """
+    added_aliases = [
+        path for path in changes['added']
+        if current[path].get('alias_of') in previous
+    ]
+    urls = []
+    for path in changes['changed'] + changes['deleted'] + added_aliases:
+        urls.append(f"{site_url}/{quote(path)}")
+        if path == "index.html" or path.endswith("/index.html"):
+            urls.append(f"{site_url}/{quote(path[:-len('index.html')])}")
+    return urls
+
+
+def apply_changes(changes, source, remote):
+    """Mirror the changes from source into a local stand-in for the remote.
+
+    Aliases are copied as regular files, as a CDN or object store would
+    hold them.
+    """
+    source = Path(source)
+    remote = Path(remote)
+    for path in changes['added'] + changes['changed']:
+        target = remote / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source / path, target)
+    for path in changes['deleted']:
+        target = remote / path
+        if target.exists():
+            target.unlink()
+
+
+def main():
+    """Main function to compute the deploy changeset."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--previous", type=Path,
+                            help=f"manifest of the last deploy (default: REMOTE/{MANIFEST_NAME})")
+    arg_parser.add_argument("--remote", type=Path,
+                            help="local directory standing in for the deployed site")
+    arg_parser.add_argument("--apply", action="store_true",
+                            help="copy the changes into --remote and update its manifest")
+    args = arg_parser.parse_args()
+
+    if args.apply and not args.remote:
+        arg_parser.error("--apply needs --remote")
+
+    print("Hashing site files...")
+    manifest = build_manifest(SITE_DIR)
+    print(f"Found {len(manifest)} deployable files")
+
+    previous = None
+    if args.previous:
+        previous = load_manifest(args.previous)
+    elif args.remote:
+        previous = load_manifest(args.remote / MANIFEST_NAME)
+        if previous is None and args.remote.exists():
+            print(f"No manifest in {args.remote}, hashing its content...")
+            previous = build_manifest(args.remote)
+    if previous is None:
+        print("No previous manifest, everything is new")
+        previous = {}
+
+    changes = diff_manifests(previous, manifest)
+    urls = purge_urls(changes, previous, manifest)
+
+    write_manifest(manifest, OUTPUT_DIR / MANIFEST_NAME)
+    with open(OUTPUT_DIR / "changes.json", 'w', encoding='utf-8') as f:
+        json.dump(changes, f, indent=1)
+        f.write("\n")
+    with open(OUTPUT_DIR / "purge.txt", 'w', encoding='utf-8') as f:
+        f.writelines(url + "\n" for url in urls)
+
+    print(f"{len(changes['added'])} added, {len(changes['changed'])} changed, "
+          f"{len(changes['deleted'])} deleted, {len(urls)} URLs to purge")
+    print(f"Wrote {OUTPUT_DIR}/changes.json and {OUTPUT_DIR}/purge.txt")
+
+    if args.apply:
+        apply_changes(changes, SITE_DIR, args.remote)
+        write_manifest(manifest, args.remote / MANIFEST_NAME)
+        print(f"Applied changes to {args.remote}")
+
+
+if __name__ == "__main__":
+    main()
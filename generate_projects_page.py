@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
+import html
 import os
 import re
 from html.parser import HTMLParser
 from datetime import datetime
 
+from web_fonts import FONTS_CSS_URL, preload_links, remote_font_links
+
+# Google Fonts stylesheets of the page, kept until fonts.css self-hosts them
+GOOGLE_FONTS_URLS = [
+    "//fonts.googleapis.com/css?family=Merriweather:300,700,700italic,300italic%7COpen+Sans:700,400",
+    "//fonts.googleapis.com/css?subset=latin%2Clatin-ext%2Ccyrillic%2Ccyrillic-ext&family=Lato%3A300%2C300italic%2C400%2C400italic%2C700%2C700italic%2C900%2C900italic%7CQuicksand%3A300%2C300italic%2C400%2C400italic%2C700%2C700italic%2C900%2C900italic&ver=4.1.1",
+    "//fonts.googleapis.com/css?family=Open+Sans+Condensed:300",
+]
+
 class ArticleMetadataParser(HTMLParser):
     def __init__(self):
         super().__init__()
@@ -96,6 +106,11 @@ def generate_projects_page():
 
     html_2015 = generate_html_rows(p52_2015)
     html_2016 = generate_html_rows(p52_2016)
+    font_links = "\n".join(
+        f'    <link rel="stylesheet" type="text/css" href="{html.escape(url)}" />'
+        for url in remote_font_links(GOOGLE_FONTS_URLS)
+    )
+    font_preloads = "\n".join(f"    {link}" for link in preload_links())
 
     page_content = f'''<!DOCTYPE html>
 <html lang="fr">
@@ -116,9 +131,9 @@ def generate_projects_page():
     <link rel="stylesheet" type="text/css" href="../css/screen.css" />
     <link rel="stylesheet" type="text/css" href="../css/isso.css" />
     <link rel="stylesheet" type="text/css" href="../css/slick.css"/>
-    <link rel="stylesheet" type="text/css" href="//fonts.googleapis.com/css?family=Merriweather:300,700,700italic,300italic%7COpen+Sans:700,400" />
-    <link rel='stylesheet' href='//fonts.googleapis.com/css?subset=latin%2Clatin-ext%2Ccyrillic%2Ccyrillic-ext&#038;family=Lato%3A300%2C300italic%2C400%2C400italic%2C700%2C700italic%2C900%2C900italic%7CQuicksand%3A300%2C300italic%2C400%2C400italic%2C700%2C700italic%2C900%2C900italic+rel%3D%27stylesheet%27+type%3D%27text%2Fcss&#038;ver=4.1.1' type='text/css' media='all' />
-    <link rel="stylesheet" type="text/css" href="//fonts.googleapis.com/css?family=Open+Sans+Condensed:300" />
+{font_links}
+    <link rel="stylesheet" type="text/css" href="{FONTS_CSS_URL}" />
+{font_preloads}
     <link rel="stylesheet" type="text/css" href="../css/shadowbox.css" />
     <link rel="canonical" href="//www.melmelboo.fr/projects" />
     <meta name="referrer" content="origin" />
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Script to rebuild blog index pages for static melmelboo site.
-Extracts article metadata and regenerates paginated index pages.
+Extracts article metadata and regenerates paginated index pages, along
+with the AMP variant of every article and the blog service worker.
 """
 
 import os
@@ -11,8 +12,21 @@ from datetime import datetime
 from html.parser import HTMLParser
 import json
 
+from amp_pages import write_amp_page
+from service_worker import write_service_worker
+from web_fonts import preload_links
+
 POSTS_PER_PAGE = 6
 BLOG_DIR = Path("blog")
+# Blog subdirectories that are not articles
+EXCLUDE_DIRS = {'page', 'author', 'tag', 'public', 'assets', 'rss'}
+# Per-page listing fragment fetched by assets/js/load-more.js
+FRAGMENT_NAME = "posts.json"
+# Scripts added to every listing page
+FOOTER_SCRIPTS = [
+    '<script type="text/javascript" src="/blog/assets/js/load-more.js"></script>',
+    '<script type="text/javascript" src="/blog/assets/js/sw-register.js"></script>',
+]
 
 
 class ArticleParser(HTMLParser):
@@ -22,12 +36,20 @@ class ArticleParser(HTMLParser):
         super().__init__()
         self.title = ""
         self.excerpt = ""
+        self.description = ""
         self.image = ""
+        self.image_width = ""
+        self.image_height = ""
         self.date = ""
+        self.modified_date = ""
+        self.tags = []
+        self.publisher_url = ""
         self.author = ""
         self.url = ""
+        self.structured_data = ""
         self.in_title = False
         self.in_content = False
+        self.in_structured_data = False
         self.content_text = ""
 
     def handle_starttag(self, tag, attrs):
@@ -41,12 +63,32 @@ class ArticleParser(HTMLParser):
         if tag == "section" and "post-content" in attrs_dict.get("class", ""):
             self.in_content = True
 
+        # Extract schema.org metadata (author, publisher)
+        if tag == "script" and attrs_dict.get("type") == "application/ld+json":
+            self.in_structured_data = True
+
         # Extract featured image
         if tag == "meta":
             if attrs_dict.get("property") == "og:image":
                 self.image = attrs_dict.get("content", "")
+            elif attrs_dict.get("property") == "og:image:width":
+                self.image_width = attrs_dict.get("content", "")
+            elif attrs_dict.get("property") == "og:image:height":
+                self.image_height = attrs_dict.get("content", "")
             elif attrs_dict.get("property") == "article:published_time":
                 self.date = attrs_dict.get("content", "")
+            elif attrs_dict.get("property") == "article:modified_time":
+                self.modified_date = attrs_dict.get("content", "")
+            elif attrs_dict.get("property") == "article:tag":
+                tag_name = attrs_dict.get("content", "")
+                if tag_name and tag_name not in self.tags:
+                    self.tags.append(tag_name)
+            elif attrs_dict.get("property") == "article:publisher":
+                self.publisher_url = attrs_dict.get("content", "")
+            elif attrs_dict.get("property") == "og:description":
+                # Keep the first one, the theme repeats it empty
+                if not self.description:
+                    self.description = attrs_dict.get("content", "")
             elif attrs_dict.get("property") == "og:url":
                 self.url = attrs_dict.get("content", "")
             elif attrs_dict.get("name") == "description":
@@ -55,6 +97,8 @@ class ArticleParser(HTMLParser):
                     self.excerpt = attrs_dict.get("content", "")
 
     def handle_data(self, data):
+        if self.in_structured_data:
+            self.structured_data += data
         if self.in_title:
             self.title += data.strip()
         if self.in_content:
@@ -66,6 +110,8 @@ class ArticleParser(HTMLParser):
     def handle_endtag(self, tag):
         if tag == "h1":
             self.in_title = False
+        if tag == "script":
+            self.in_structured_data = False
         if tag == "section" and self.in_content:
             self.in_content = False
             # Use first 200 chars of content as excerpt if not set
@@ -73,6 +119,16 @@ class ArticleParser(HTMLParser):
                 self.excerpt = self.content_text[:200].strip()
 
 
+def parse_date(value):
+    """Parse an ISO 8601 meta date, or return None."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
 def extract_article_metadata(article_path):
     """Extract metadata from an article's index.html."""
     html_file = article_path / "index.html"
@@ -89,37 +145,57 @@ def extract_article_metadata(article_path):
         # Get relative URL from path
         rel_url = str(article_path.relative_to(BLOG_DIR)) + "/"
 
-        # Parse date
-        date_obj = None
-        if parser.date:
-            try:
-                date_obj = datetime.fromisoformat(parser.date.replace('Z', '+00:00'))
-            except:
-                pass
+        # Parse dates
+        date_obj = parse_date(parser.date)
+        modified_date_obj = parse_date(parser.modified_date)
+
+        try:
+            structured_data = json.loads(parser.structured_data) if parser.structured_data else {}
+        except ValueError:
+            structured_data = {}
+        if not isinstance(structured_data, dict):
+            structured_data = {}
 
-        return {
+        metadata = {
             'title': parser.title or "Untitled",
             'excerpt': parser.excerpt[:200] if parser.excerpt else "",
+            'description': parser.description or parser.excerpt,
             'image': parser.image,
+            'image_width': parser.image_width,
+            'image_height': parser.image_height,
             'date': date_obj,
             'date_str': date_obj.strftime("%d %B %Y") if date_obj else "",
+            'modified_date': modified_date_obj,
+            'tags': parser.tags,
+            'publisher_url': parser.publisher_url,
+            'author': structured_data.get('author'),
+            'publisher': structured_data.get('publisher'),
             'url': rel_url,
+            'canonical_url': f"https://www.melmelboo.fr/blog/{rel_url}",
             'slug': article_path.name
         }
     except Exception as e:
         print(f"Error parsing {article_path}: {e}")
         return None
 
+    # Keep the AMP twin in sync while the article is at hand. A broken AMP
+    # page is reported but must not drop the article from the listing.
+    try:
+        if write_amp_page(article_path, content, metadata):
+            print(f"Regenerated blog/{rel_url}amp/index.html")
+    except Exception as e:
+        print(f"Error writing AMP page of {article_path}: {e}")
+
+    return metadata
+
 
 def collect_articles():
     """Collect all article metadata."""
     articles = []
 
     # Find all article directories (exclude system dirs)
-    exclude_dirs = {'page', 'author', 'tag', 'public', 'assets', 'rss'}
-
     for item in BLOG_DIR.iterdir():
-        if item.is_dir() and item.name not in exclude_dirs:
+        if item.is_dir() and item.name not in EXCLUDE_DIRS:
             metadata = extract_article_metadata(item)
             if metadata:
                 articles.append(metadata)
@@ -132,12 +208,16 @@ def collect_articles():
     return articles
 
 
-def generate_index_page(articles, page_num, total_pages):
-    """Generate HTML for a blog index page."""
-
+def get_page_articles(articles, page_num):
+    """Return the POSTS_PER_PAGE slice of articles shown on a page."""
     start_idx = (page_num - 1) * POSTS_PER_PAGE
     end_idx = start_idx + POSTS_PER_PAGE
-    page_articles = articles[start_idx:end_idx]
+    return articles[start_idx:end_idx]
+
+
+def generate_posts_html(articles, page_num):
+    """Generate the <article> blocks listed on a blog index page."""
+    page_articles = get_page_articles(articles, page_num)
 
     posts_html = []
     for article in page_articles:
@@ -173,6 +253,30 @@ def generate_index_page(articles, page_num, total_pages):
 </article>"""
         posts_html.append(post_html)
 
+    return posts_html
+
+
+def generate_page_fragment(articles, page_num, total_pages):
+    """Generate the JSON listing fragment for a paginated page.
+
+    Holds the same posts as blog/page/N/index.html so the listing can
+    load them in place instead of reloading the whole document.
+    """
+    next_url = f"/blog/page/{page_num + 1}/{FRAGMENT_NAME}" if page_num < total_pages else None
+    fragment = {
+        'page': page_num,
+        'total_pages': total_pages,
+        'html': "\n".join(generate_posts_html(articles, page_num)),
+        'next': next_url,
+    }
+    return json.dumps(fragment, ensure_ascii=False)
+
+
+def generate_index_page(articles, page_num, total_pages):
+    """Generate HTML for a blog index page."""
+
+    posts_html = generate_posts_html(articles, page_num)
+
     # Generate pagination
     pagination = ""
     if total_pages > 1:
@@ -222,11 +326,22 @@ def generate_index_page(articles, page_num, total_pages):
         header_match = re.search(r'(.*?<div class="posts-loop">\s*)', template, re.DOTALL)
         header = header_match.group(1) if header_match else ""
 
+        # Fetch the above-the-fold fonts without waiting for fonts.css,
+        # replacing the hints of a previous build whose URLs may be stale
+        header = re.sub(r'[ \t]*<link rel="preload" href="[^"]*" as="font"[^>]*>\n', '', header)
+        for link in preload_links():
+            header = header.replace("</head>", f"    {link}\n</head>", 1)
+
         # Extract footer (everything after </div> that closes posts-loop, before closing </body>)
         # Look for the closing div after pagination or articles
         footer_match = re.search(r'</div>\s*(</main>.*?</body>.*?</html>)', template, re.DOTALL)
         footer = "\n</div>\n" + footer_match.group(1) if footer_match else "\n</div>\n</main>\n</body>\n</html>"
 
+        # Progressive "load more" and service worker on top of the plain pages
+        for script in FOOTER_SCRIPTS:
+            if script not in footer:
+                footer = footer.replace("</body>", f"    {script}\n</body>", 1)
+
         # Combine
         return header + "\n".join(posts_html) + pagination + footer
 
@@ -268,6 +383,12 @@ def main():
             with open(page_path / "index.html", 'w', encoding='utf-8') as f:
                 f.write(page_html)
 
+        with open(page_path / FRAGMENT_NAME, 'w', encoding='utf-8') as f:
+            f.write(generate_page_fragment(articles, page_num, total_pages))
+
+    if write_service_worker(articles):
+        print("Generating blog/sw.js...")
+
     print("Done! Blog index rebuilt successfully.")
 
 
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Script to precompute "À lire aussi" related articles for the static blog.
+Builds TF-IDF vectors from article titles and text, finds the most similar
+posts for every article and injects a related block into each article page.
+
+Results are cached per article content hash, so a rebuild only rescores
+the rows touched by new, edited or deleted articles. Use --full to
+recompute every row (e.g. after a large batch of edits shifted the IDF).
+
+Needs NumPy and SciPy, see requirements.txt.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from rebuild_blog_index import ArticleParser, BLOG_DIR, EXCLUDE_DIRS
+from service_worker import write_service_worker
+
+TOP_K = 4
+TITLE_WEIGHT = 3
+MIN_TOKEN_LENGTH = 3
+# Rows scored per sparse product. Scores stay sparse, so memory is bounded
+# by the non-zero similarities of BLOCK_SIZE rows (at most BLOCK_SIZE x n).
+BLOCK_SIZE = 64
+CACHE_FILE = Path(".related-cache.json")
+
+RELATED_START = "<!-- related:start -->"
+RELATED_END = "<!-- related:end -->"
+
+TOKEN_RE = re.compile(r"[^\W\d_]+")
+STOPWORDS = {
+    "alors", "aussi", "autre", "autres", "avant", "avec", "avoir", "bien",
+    "car", "cela", "ces", "cet", "cette", "ceux", "chez", "comme", "comment",
+    "dans", "des", "deux", "donc", "elle", "elles", "encore", "entre", "est",
+    "été", "était", "être", "fait", "faire", "leur", "leurs", "les", "lui",
+    "mais", "même", "mes", "moi", "mon", "nos", "notre", "nous", "ont",
+    "par", "pas", "peu", "plus", "pour", "puis", "quand", "que", "quel",
+    "quelle", "qui", "sans", "ses", "son", "sont", "sous", "sur", "tes",
+    "toi", "ton", "tous", "tout", "toute", "toutes", "très", "une", "vos",
+    "votre", "vous",
+}
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens, minus French stopwords."""
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+def parse_article(article_path):
+    """Extract the title and body text of an article."""
+    html_file = article_path / "index.html"
+    if not html_file.exists():
+        return None
+
+    try:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Error reading {article_path}: {e}")
+        return None
+
+    parser = ArticleParser()
+    parser.feed(content)
+    if not parser.title or not parser.content_text:
+        return None
+
+    text = parser.title + "\n" + parser.content_text
+    return {
+        'slug': article_path.name,
+        'title': parser.title,
+        'tokens': tokenize(parser.title) * TITLE_WEIGHT + tokenize(parser.content_text),
+        'hash': hashlib.sha1(text.encode('utf-8')).hexdigest(),
+    }
+
+
+def collect_documents():
+    """Collect every article as a tokenized document, sorted by slug."""
+    documents = []
+    for item in sorted(BLOG_DIR.iterdir()):
+        if item.is_dir() and item.name not in EXCLUDE_DIRS:
+            document = parse_article(item)
+            if document:
+                documents.append(document)
+    return documents
+
+
+def build_tfidf(documents):
+    """Build the L2-normalized TF-IDF matrix (documents x terms)."""
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    counts = []
+    for document in documents:
+        for token, count in Counter(document['tokens']).items():
+            indices.append(vocabulary.setdefault(token, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    tf = sparse.csr_matrix(
+        (np.log1p(np.asarray(counts, dtype=np.float32)),
+         np.asarray(indices, dtype=np.int32),
+         np.asarray(indptr, dtype=np.int64)),
+        shape=(len(documents), len(vocabulary)),
+    )
+
+    n_docs = len(documents)
+    df = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    tfidf = tf @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ tfidf, dtype=np.float32)
+
+
+def sparse_row_top_k(scores, offset, k, exclude=None):
+    """Return the k best (col, score) of one row of a sparse score matrix.
+
+    Zero scores are not stored, so only the actual matches are ranked.
+    """
+    start, end = scores.indptr[offset], scores.indptr[offset + 1]
+    cols = scores.indices[start:end]
+    values = scores.data[start:end]
+    keep = values > 0
+    if exclude is not None:
+        keep &= cols != exclude
+    cols, values = cols[keep], values[keep]
+
+    if len(values) > k:
+        best = np.argpartition(-values, k - 1)[:k]
+        cols, values = cols[best], values[best]
+    order = np.argsort(-values, kind="stable")
+    return [(int(cols[i]), float(values[i])) for i in order]
+
+
+def top_k_similar(matrix, rows, k):
+    """Return {row: [(col, score), ...]} with the k best matches per row.
+
+    Rows are scored BLOCK_SIZE at a time with one sparse product each.
+    """
+    results = {}
+    k = min(k, matrix.shape[0] - 1)
+    if k <= 0:
+        return {row: [] for row in rows}
+
+    matrix_t = matrix.T.tocsc()
+    for start in range(0, len(rows), BLOCK_SIZE):
+        block = rows[start:start + BLOCK_SIZE]
+        scores = sparse.csr_matrix(matrix[block] @ matrix_t)
+        for offset, row in enumerate(block):
+            # never match itself
+            results[int(row)] = sparse_row_top_k(scores, offset, k, exclude=row)
+    return results
+
+
+def load_cache():
+    """Load the per-article cache of content hashes and related posts."""
+    if not CACHE_FILE.exists():
+        return {}
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compute_related(documents, cache, full=False):
+    """Compute the related slugs of every document.
+
+    Articles whose content hash changed, and articles whose cached
+    neighbors changed or disappeared, get a full row recomputed. Other
+    articles keep their cached neighbors and only check the changed
+    articles as new candidates.
+    """
+    slugs = [document['slug'] for document in documents]
+    index = {slug: i for i, slug in enumerate(slugs)}
+    changed = {
+        document['slug'] for document in documents
+        if cache.get(document['slug'], {}).get('hash') != document['hash']
+    }
+    removed = set(cache) - set(slugs)
+    stale = changed | removed
+
+    dirty = []
+    clean = []
+    for i, slug in enumerate(slugs):
+        cached = cache.get(slug)
+        if full or slug in changed or any(other in stale for other, _ in cached['related']):
+            dirty.append(i)
+        else:
+            clean.append(i)
+
+    if not dirty and not changed:
+        return {slug: cache[slug]['related'] for slug in slugs}, set()
+
+    print(f"Vectorizing {len(documents)} articles...")
+    matrix = build_tfidf(documents)
+
+    print(f"Scoring {len(dirty)} articles...")
+    related = {}
+    for row, matches in top_k_similar(matrix, dirty, TOP_K).items():
+        related[slugs[row]] = [[slugs[col], round(score, 4)] for col, score in matches]
+
+    # Clean rows only need to consider the changed articles as newcomers
+    changed_cols = np.asarray(sorted(index[slug] for slug in changed), dtype=np.int64)
+    changed_t = matrix[changed_cols].T.tocsc() if len(changed_cols) else None
+    for start in range(0, len(clean), BLOCK_SIZE):
+        block = clean[start:start + BLOCK_SIZE]
+        scores = None
+        if changed_t is not None:
+            scores = sparse.csr_matrix(matrix[block] @ changed_t)
+        for offset, row in enumerate(block):
+            candidates = [tuple(match) for match in cache[slugs[row]]['related']]
+            if scores is not None:
+                candidates.extend(
+                    (slugs[changed_cols[col]], round(score, 4))
+                    for col, score in sparse_row_top_k(scores, offset, TOP_K)
+                    if changed_cols[col] != row
+                )
+            candidates.sort(key=lambda match: match[1], reverse=True)
+            related[slugs[row]] = [list(match) for match in candidates[:TOP_K]]
+
+    updated = {
+        slug for slug in slugs
+        if slug in changed or slug not in cache or related[slug] != cache[slug]['related']
+        or any(other in changed for other, _ in related[slug])
+    }
+    return related, updated
+
+
+def render_related_block(related, titles):
+    """Render the "À lire aussi" block for an article page."""
+    items = "\n".join(
+        f'    <li><a href="../{slug}/index.html">{html.escape(titles[slug])}</a></li>'
+        for slug, _ in related
+    )
+    return f"""{RELATED_START}
+<section class="related-posts">
+  <h4 class="share-title">À lire aussi</h4>
+  <ul>
+{items}
+  </ul>
+</section>
+{RELATED_END}"""
+
+
+def inject_related_block(content, block):
+    """Insert or replace the related block at the end of the article."""
+    existing = re.compile(re.escape(RELATED_START) + r'.*?' + re.escape(RELATED_END), re.DOTALL)
+    if existing.search(content):
+        return existing.sub(lambda _: block, content, count=1)
+
+    content_start = content.find('class="post-content"')
+    article_end = content.find('</article>', content_start)
+    if content_start == -1 or article_end == -1:
+        return content
+    return content[:article_end] + block + "\n    " + content[article_end:]
+
+
+def main():
+    """Main function to precompute related articles."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--full", action="store_true",
+                            help="recompute every article instead of only changed ones")
+    args = arg_parser.parse_args()
+
+    print("Collecting articles...")
+    documents = collect_documents()
+    print(f"Found {len(documents)} articles")
+
+    if not documents:
+        print("No articles found!")
+        return
+
+    cache = {} if args.full else load_cache()
+    related, updated = compute_related(documents, cache, full=args.full)
+    titles = {document['slug']: document['title'] for document in documents}
+
+    written = 0
+    for slug in sorted(updated):
+        html_file = BLOG_DIR / slug / "index.html"
+        with open(html_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        new_content = inject_related_block(content, render_related_block(related[slug], titles))
+        if new_content != content:
+            with open(html_file, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            written += 1
+
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            document['slug']: {'hash': document['hash'], 'related': related[document['slug']]}
+            for document in documents
+        }, f, ensure_ascii=False)
+
+    # Some of the pages are precached by the service worker
+    if written and write_service_worker():
+        print("Generating blog/sw.js...")
+
+    print(f"Done! Updated related articles in {written} pages.")
+
+
+if __name__ == "__main__":
+    main()
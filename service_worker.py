@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Service worker of the blog.
+Generates blog/sw.js with a precache manifest of the site assets and of the
+most recent articles, keyed by content hash.
+
+rebuild_blog_index.py picks the precached articles. Every script writing
+precached files (related_articles.py, subset_fonts.py) then refreshes the
+revisions of the same URLs, so sw.js matches the disk whatever the order
+the scripts ran in. Running this script does the same refresh by hand.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from deploy_manifest import hash_file, list_files
+from web_fonts import FONTS_DIR
+
+SW_FILE = Path("blog/sw.js")
+ASSET_DIRS = [Path("blog/assets"), Path("images"), Path("css"), Path("js")]
+# Never requested by a browser: the AMP stylesheet is inlined and the
+# vendored font sources and licenses are only served as WOFF2 subsets
+SKIPPED_ASSETS = {"blog/assets/css/amp.css"} | {
+    path.as_posix() for path in FONTS_DIR.glob("*") if path.suffix != ".woff2"
+}
+# Articles available offline, newest first
+RECENT_ARTICLES = 10
+
+SW_TEMPLATE = """/**
+ * Service worker of the blog, generated by rebuild_blog_index.py.
+ *
+ * - assets (CSS, JS, fonts, images) are served cache-first
+ * - listing pages are served stale-while-revalidate
+ * - other blog pages go to the network, falling back to the precache
+ *   which holds the most recent articles for offline reading
+ *
+ * Precached files are only downloaded again when their revision changes.
+ */
+
+/* globals self, caches, fetch, Request, Response, URL, Promise */
+"use strict";
+
+var VERSION = "__VERSION__";
+var PRECACHE = __PRECACHE_MANIFEST__;
+
+var PRECACHE_PREFIX = "melmelboo-precache-";
+var PRECACHE_NAME = PRECACHE_PREFIX + VERSION;
+var RUNTIME_NAME = "melmelboo-runtime";
+var REVISIONS_KEY = "/__precache-revisions__";
+
+var ASSET_RE = /^\\/(blog\\/)?(assets|images|css|js)\\//;
+var LISTING_RE = /^\\/blog\\/((index\\.html)?|page\\/\\d+\\/(index\\.html|posts\\.json)?)$/;
+
+// /assets/ is an alias of /blog/assets/ and directories serve index.html
+function cacheKey(url) {
+    var parsed = new URL(url, self.location.origin);
+    return parsed.origin + parsed.pathname
+        .replace(/^\\/assets\\//, "/blog/assets/")
+        .replace(/index\\.html$/, "");
+}
+
+function previousPrecache() {
+    return caches.keys().then(function (names) {
+        var previous = names.filter(function (name) {
+            return name.indexOf(PRECACHE_PREFIX) === 0 && name !== PRECACHE_NAME;
+        })[0];
+        if (!previous) {
+            return null;
+        }
+        return caches.open(previous).then(function (cache) {
+            return cache.match(REVISIONS_KEY).then(function (response) {
+                return response ? response.json() : {};
+            }).then(function (revisions) {
+                return {cache: cache, revisions: revisions};
+            });
+        });
+    });
+}
+
+self.addEventListener("install", function (event) {
+    var revisions = {};
+    PRECACHE.forEach(function (entry) {
+        revisions[entry.url] = entry.revision;
+    });
+
+    event.waitUntil(previousPrecache().then(function (previous) {
+        return caches.open(PRECACHE_NAME).then(function (cache) {
+            return Promise.all(PRECACHE.map(function (entry) {
+                var key = cacheKey(entry.url),
+                    unchanged = previous && previous.revisions[entry.url] === entry.revision;
+                return (unchanged ? previous.cache.match(key) : Promise.resolve(null))
+                    .then(function (response) {
+                        return response || fetch(new Request(entry.url, {cache: "reload"}));
+                    })
+                    .then(function (response) {
+                        if (!response.ok) {
+                            throw new Error("Precache of " + entry.url + " failed");
+                        }
+                        return cache.put(key, response);
+                    });
+            })).then(function () {
+                return cache.put(REVISIONS_KEY, new Response(JSON.stringify(revisions)));
+            });
+        });
+    }).then(function () {
+        return self.skipWaiting();
+    }));
+});
+
+// Runtime copies of precached files may be older than the new revision
+function pruneRuntime() {
+    return caches.open(RUNTIME_NAME).then(function (cache) {
+        return Promise.all(PRECACHE.map(function (entry) {
+            return cache.delete(cacheKey(entry.url));
+        }));
+    });
+}
+
+self.addEventListener("activate", function (event) {
+    event.waitUntil(caches.keys().then(function (names) {
+        return Promise.all(names.filter(function (name) {
+            return name.indexOf(PRECACHE_PREFIX) === 0 && name !== PRECACHE_NAME;
+        }).map(function (name) {
+            return caches.delete(name);
+        }));
+    }).then(pruneRuntime).then(function () {
+        return self.clients.claim();
+    }));
+});
+
+function matchIn(name, key) {
+    return caches.open(name).then(function (cache) {
+        return cache.match(key);
+    });
+}
+
+// Fresher runtime copies of pages win over the precache
+function match(key) {
+    return matchIn(RUNTIME_NAME, key).then(function (cached) {
+        return cached || matchIn(PRECACHE_NAME, key);
+    });
+}
+
+// Asset URLs are not fingerprinted: only the precache knows their revision
+function matchAsset(key) {
+    return matchIn(PRECACHE_NAME, key).then(function (cached) {
+        return cached || matchIn(RUNTIME_NAME, key);
+    });
+}
+
+function cacheFirst(request, key) {
+    return matchAsset(key).then(function (cached) {
+        return cached || fetch(request).then(function (response) {
+            if (response.ok) {
+                var copy = response.clone();
+                caches.open(RUNTIME_NAME).then(function (cache) {
+                    cache.put(key, copy);
+                });
+            }
+            return response;
+        });
+    });
+}
+
+function staleWhileRevalidate(event, key) {
+    var network = fetch(event.request).then(function (response) {
+        if (response.ok) {
+            var copy = response.clone();
+            caches.open(RUNTIME_NAME).then(function (cache) {
+                cache.put(key, copy);
+            });
+        }
+        return response;
+    });
+    event.waitUntil(network.catch(function () {}));
+    return match(key).then(function (cached) {
+        return cached || network;
+    });
+}
+
+function networkFirst(request, key) {
+    return fetch(request).catch(function (error) {
+        return match(key).then(function (cached) {
+            if (!cached) {
+                throw error;
+            }
+            return cached;
+        });
+    });
+}
+
+self.addEventListener("fetch", function (event) {
+    var request = event.request,
+        url = new URL(request.url);
+
+    if (request.method !== "GET" || url.origin !== self.location.origin) {
+        return;
+    }
+
+    var key = cacheKey(request.url);
+    if (ASSET_RE.test(url.pathname)) {
+        event.respondWith(cacheFirst(request, key));
+    } else if (LISTING_RE.test(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event, key));
+    } else if (request.mode === "navigate" && url.pathname.indexOf("/blog/") === 0) {
+        event.respondWith(networkFirst(request, key));
+    }
+});
+"""
+
+
+def recent_pages(articles):
+    """List the pages precached for offline reading, listing first."""
+    return ["blog/index.html"] + [
+        f"blog/{article['url']}index.html" for article in articles[:RECENT_ARTICLES]
+    ]
+
+
+def precached_pages():
+    """List the pages precached by the current sw.js, in manifest order."""
+    if not SW_FILE.exists():
+        return []
+    with open(SW_FILE, 'r', encoding='utf-8') as f:
+        match = re.search(r'^var PRECACHE = (\[.*?\]);$', f.read(), re.MULTILINE | re.DOTALL)
+    if not match:
+        return []
+    return [
+        entry['url'][1:] + "index.html"
+        for entry in json.loads(match.group(1)) if entry['url'].endswith("/")
+    ]
+
+
+def collect_precache_entries(pages):
+    """List the precached URLs with the content hash of their file."""
+    entries = []
+    for asset_dir in ASSET_DIRS:
+        for rel_path in list_files(asset_dir, base=asset_dir):
+            path = asset_dir / rel_path
+            if path.as_posix() not in SKIPPED_ASSETS:
+                entries.append({'url': f"/{path.as_posix()}", 'revision': hash_file(path)[0][:16]})
+
+    for page in pages:
+        path = Path(page)
+        if path.exists():
+            url = "/" + page[:-len("index.html")]
+            entries.append({'url': url, 'revision': hash_file(path)[0][:16]})
+    return entries
+
+
+def render_service_worker(entries):
+    """Render sw.js, versioned by the hash of its precache manifest."""
+    manifest = json.dumps(entries, indent=4)
+    version = hashlib.sha256(manifest.encode('utf-8')).hexdigest()[:16]
+    return (SW_TEMPLATE
+            .replace("__VERSION__", version)
+            .replace("__PRECACHE_MANIFEST__", manifest))
+
+
+def write_service_worker(articles=None):
+    """Write blog/sw.js unless its precache manifest is unchanged.
+
+    Without articles, the pages precached by the current sw.js are kept
+    and only the revisions are refreshed. Browsers install a new service
+    worker whenever sw.js changes, so it is only rewritten when an asset
+    or a precached page changed. Returns True when the file was (re)written.
+    """
+    if articles is None and not SW_FILE.exists():
+        return False
+
+    pages = recent_pages(articles) if articles is not None else precached_pages()
+    sw_js = render_service_worker(collect_precache_entries(pages))
+    if SW_FILE.exists():
+        with open(SW_FILE, 'r', encoding='utf-8') as f:
+            if f.read() == sw_js:
+                return False
+
+    with open(SW_FILE, 'w', encoding='utf-8') as f:
+        f.write(sw_js)
+    return True
+
+
+def main():
+    """Main function to refresh the service worker revisions."""
+    if not SW_FILE.exists():
+        print(f"No {SW_FILE} yet, run rebuild_blog_index.py first!")
+        return
+    if write_service_worker():
+        print(f"Generating {SW_FILE}...")
+    else:
+        print(f"{SW_FILE} is up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Script to build the self-hosted web fonts of the static melmelboo site.
+Scans the article corpus for the characters it actually uses, subsets the
+fonts vendored in blog/assets/fonts to those glyphs as WOFF2 and writes the
+matching @font-face rules to blog/assets/css/fonts.css.
+
+Runs fully offline: fonts listed in FONTS but not vendored yet are skipped.
+Needs fontTools and Brotli, see requirements.txt.
+"""
+
+import io
+import string
+
+from fontTools import subset
+
+from rebuild_blog_index import ArticleParser, BLOG_DIR, EXCLUDE_DIRS
+from service_worker import write_service_worker
+from web_fonts import FONTS, FONTS_CSS, FONTS_DIR, generate_fonts_css, vendored_fonts, woff2_name
+
+# Characters kept even if no article uses them yet (menus, dates, typography)
+BASE_CHARACTERS = (
+    string.printable
+    + "àâäçéèêëîïôöùûüÿœæÀÂÄÇÉÈÊËÎÏÔÖÙÛÜŸŒÆ"
+    + "«»‘’“”…–—•€°·  "
+)
+
+
+def collect_codepoints():
+    """Collect every character used by the article titles and text."""
+    characters = set(BASE_CHARACTERS)
+    for item in BLOG_DIR.iterdir():
+        html_file = item / "index.html"
+        if not item.is_dir() or item.name in EXCLUDE_DIRS or not html_file.exists():
+            continue
+        with open(html_file, 'r', encoding='utf-8') as f:
+            parser = ArticleParser()
+            parser.feed(f.read())
+        characters.update(parser.title)
+        characters.update(parser.content_text)
+    return {ord(char) for char in characters if char.isprintable() or char.isspace()}
+
+
+def subset_font(source, codepoints):
+    """Subset a font file to the given codepoints, returning WOFF2 bytes."""
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.notdef_outline = True
+
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+
+    output = io.BytesIO()
+    subset.save_font(font, output, options)
+    return output.getvalue()
+
+
+def write_if_changed(path, data):
+    """Write bytes to path unless it already holds them."""
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.write_bytes(data)
+    return True
+
+
+def main():
+    """Main function to build the web font subsets."""
+    fonts = vendored_fonts()
+    for font in FONTS:
+        if font not in fonts:
+            print(f"Skipping {font['family']} {font['weight']}: {FONTS_DIR / font['source']} is not vendored")
+
+    if not fonts:
+        print("No vendored fonts found!")
+        return
+
+    print("Scanning articles for used characters...")
+    codepoints = collect_codepoints()
+    print(f"Found {len(codepoints)} characters")
+
+    changed = False
+    for font in fonts:
+        target = FONTS_DIR / woff2_name(font)
+        data = subset_font(FONTS_DIR / font['source'], codepoints)
+        if write_if_changed(target, data):
+            print(f"Generating {target} ({len(data)} bytes)...")
+            changed = True
+
+    if write_if_changed(FONTS_CSS, generate_fonts_css(fonts).encode('utf-8')):
+        print(f"Generating {FONTS_CSS}...")
+        changed = True
+
+    # The fonts are precached, and served cache-first, by the service worker
+    if changed and write_service_worker():
+        print("Generating blog/sw.js...")
+
+    print("Done! Fonts subset successfully.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Self-hosted web fonts of the site.
+Holds the font configuration shared by subset_fonts.py, which builds the
+WOFF2 subsets and fonts.css, and by the page generators, which add preload
+hints for the above-the-fold fonts and drop the Google Fonts stylesheets
+replaced by fonts.css.
+"""
+
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FONTS_DIR = Path("blog/assets/fonts")
+FONTS_CSS = Path("blog/assets/css/fonts.css")
+# URL the pages link fonts.css from. Its url(../fonts/...) rules resolve
+# against it, so preload hints must use the same /assets/fonts URL or the
+# browser downloads each font twice.
+FONTS_CSS_URL = "/assets/css/fonts.css"
+FONTS_URL = "/assets/fonts"
+
+# Families and weights rendered by screen.css, all OFL-licensed (see the
+# OFL-*.txt files next to the sources). Preloaded fonts render above the
+# fold (sidebar menu and post titles), the others are fetched on demand.
+FONTS = [
+    {'family': 'Open Sans Condensed', 'weight': 300, 'style': 'normal',
+     'source': 'opensanscondensed-light.ttf', 'preload': True},
+    {'family': 'Open Sans', 'weight': 400, 'style': 'normal',
+     'source': 'opensans-regular.ttf', 'preload': False},
+    {'family': 'Open Sans', 'weight': 700, 'style': 'normal',
+     'source': 'opensans-bold.ttf', 'preload': False},
+    {'family': 'Quicksand', 'weight': 400, 'style': 'normal',
+     'source': 'quicksand-regular.ttf', 'preload': False},
+]
+
+
+def woff2_name(font):
+    """Name of the WOFF2 subset built from a vendored font."""
+    return Path(font['source']).with_suffix(".woff2").name
+
+
+def vendored_fonts():
+    """List the configured fonts whose source file is in the repository."""
+    return [font for font in FONTS if (FONTS_DIR / font['source']).exists()]
+
+
+def generate_fonts_css(fonts):
+    """Generate the @font-face rules of the built WOFF2 subsets."""
+    rules = ["/* Self-hosted fonts, subsets generated by subset_fonts.py */"]
+    for font in fonts:
+        rules.append(f"""@font-face {{
+  font-family: '{font['family']}';
+  font-style: {font['style']};
+  font-weight: {font['weight']};
+  font-display: swap;
+  src: url(../fonts/{woff2_name(font)}) format('woff2');
+}}""")
+    return "\n".join(rules) + "\n"
+
+
+def preload_links():
+    """List the preload hints of the above-the-fold fonts that are built."""
+    return [
+        f'<link rel="preload" href="{FONTS_URL}/{woff2_name(font)}" as="font" type="font/woff2" crossorigin>'
+        for font in vendored_fonts()
+        if font['preload'] and (FONTS_DIR / woff2_name(font)).exists()
+    ]
+
+
+def self_hosted_families():
+    """List the families whose every configured weight is vendored."""
+    vendored = vendored_fonts()
+    return {
+        font['family'] for font in FONTS
+        if all(other in vendored for other in FONTS if other['family'] == font['family'])
+    }
+
+
+def google_fonts_families(url):
+    """List the families requested by a Google Fonts stylesheet URL."""
+    query = parse_qs(urlsplit(url).query)
+    return [
+        family.split(':')[0].strip()
+        for value in query.get('family', [])
+        for family in value.split('|')
+    ]
+
+
+def remote_font_links(urls):
+    """Keep the Google Fonts stylesheets that fonts.css does not replace yet.
+
+    A stylesheet is dropped once every family it requests that FONTS
+    lists is self-hosted. Families no stylesheet of the site uses, like
+    Merriweather or Lato, never keep a stylesheet alive.
+    """
+    hosted = self_hosted_families()
+    used = {font['family'] for font in FONTS}
+    return [
+        url for url in urls
+        if any(family in used and family not in hosted for family in google_fonts_families(url))
+    ]